@@ -1,14 +1,17 @@
 from persistence.loader import load_employees_for_day, load_tasks
 from optimizer import TaskOptimizer
+from ortools.sat.python import cp_model
+import argparse
 import sys
 
-def main():
-    print("--- Daily Task Planner (15-min Resolution) ---")
-    print("Loading data from TOML files...")
-    
+DAYS = ["segunda", "terca", "quarta", "quinta", "sexta", "sabado", "domingo"]
+
+def plan_day(day_key: str, solver: cp_model.CpSolver, hint: bool = True):
+    print(f"\n=== {day_key} ===")
     try:
-        employees = load_employees_for_day("turnos.toml", day_key="segunda")
-        tasks = load_tasks("tarefas.toml", day_key="segunda")
+        # TOML files are parsed once and cached across days
+        employees = load_employees_for_day("turnos.toml", day_key=day_key)
+        tasks = load_tasks("tarefas.toml", day_key=day_key)
     except Exception as e:
         print(f"Error loading data: {e}")
         # Identify if it's tomllib missing
@@ -20,14 +23,14 @@ def main():
     
     # Filter out employees with no shifts
     active_employees = [e for e in employees if e.shifts]
-    print(f"Active employees for Monday: {len(active_employees)}")
+    print(f"Active employees for {day_key}: {len(active_employees)}")
     
     if not active_employees or not tasks:
         print("No active employees or tasks found. Check your TOML data.")
         return
 
     print("\nRunning Optimizer (CP-SAT)...")
-    optimizer = TaskOptimizer(active_employees, tasks)
+    optimizer = TaskOptimizer(active_employees, tasks, hint=hint, solver=solver)
     schedule = optimizer.solve()
 
     if schedule:
@@ -35,9 +38,10 @@ def main():
         schedule_str = schedule.to_string(active_employees)
         print(schedule_str)
         
-        with open("horario_segunda.txt", "w", encoding="utf-8") as f:
+        out_path = f"horario_{day_key}.txt"
+        with open(out_path, "w", encoding="utf-8") as f:
             f.write(schedule_str)
-        print("\nSchedule saved to 'horario_segunda.txt'")
+        print(f"\nSchedule saved to '{out_path}'")
         
         # Calculate metrics (Optional verification)
         # metrics = schedule.calculate_metrics(active_employees, tasks)
@@ -45,5 +49,21 @@ def main():
     else:
         print("Failed to find a solution. Constraints might be too tight.")
 
+def main():
+    parser = argparse.ArgumentParser(description="Daily Task Planner (CP-SAT)")
+    parser.add_argument("--days", nargs="+", choices=DAYS, default=["segunda"],
+                        help="days to plan, in order (default: segunda)")
+    parser.add_argument("--no-hint", action="store_true",
+                        help="start the solver cold, without the greedy warm-start hint (debugging)")
+    args = parser.parse_args()
+
+    print("--- Daily Task Planner (15-min Resolution) ---")
+    print("Loading data from TOML files...")
+
+    # One solver for the whole run; each day only builds its own model
+    solver = cp_model.CpSolver()
+    for day_key in args.days:
+        plan_day(day_key, solver, hint=not args.no_hint)
+
 if __name__ == "__main__":
     main()
@@ -1,5 +1,20 @@
 from dataclasses import dataclass, field
-from typing import List, Dict, Optional, Set
+from typing import List, Dict, FrozenSet, Optional, Sequence, Set
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+    _HAVE_NUMBA = True
+except ImportError:
+    # Numba is optional: without it the kernels below run as plain Python
+    # (or as the Cython build in model_metrics.pyx, if compiled).
+    _HAVE_NUMBA = False
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+    prange = range
 
 # --- Time Constants and Helpers ---
 START_HOUR = 6
@@ -11,8 +26,7 @@ PHYSICAL_END_HOUR = 26
 BLOCKS_PER_HOUR = 4 
 TOTAL_BLOCKS = (PHYSICAL_END_HOUR - START_HOUR) * BLOCKS_PER_HOUR
 
-def time_to_block(hour: int, minute: int) -> int:
-    """Converts a time (HH:MM) to a block index."""
+def _time_to_block(hour: int, minute: int) -> int:
     # Handle wrapping hours (00:00 -> 24:00, 01:00 -> 25:00) strictly for calculation
     # Only if they are very small and we expect late night.
     effective_hour = hour
@@ -29,8 +43,7 @@ def time_to_block(hour: int, minute: int) -> int:
     block = relative_hour * BLOCKS_PER_HOUR + (minute // 15)
     return block
 
-def block_to_time(block_idx: int) -> str:
-    """Converts a block index back to HH:MM string."""
+def _block_to_time(block_idx: int) -> str:
     total_minutes = block_idx * 15
     absolute_minutes = (START_HOUR * 60) + total_minutes
     
@@ -38,9 +51,33 @@ def block_to_time(block_idx: int) -> str:
     minute = absolute_minutes % 60
     return f"{hour:02d}:{minute:02d}"
 
+# Lookup tables for the hot helpers: [hour][minute // 15] -> block, block -> "HH:MM".
+# Hours up to 47 cover the loader's "+24h" late-night convention.
+_TIME_TO_BLOCK = [[_time_to_block(h, q * 15) for q in range(BLOCKS_PER_HOUR)] for h in range(48)]
+_BLOCK_TO_TIME_STR = [_block_to_time(b) for b in range(TOTAL_BLOCKS)]
+
+def time_to_block(hour: int, minute: int) -> int:
+    """Converts a time (HH:MM) to a block index."""
+    if 0 <= hour < 48 and 0 <= minute < 60:
+        return _TIME_TO_BLOCK[hour][minute // 15]
+    return _time_to_block(hour, minute)
+
+def time_to_block_array(hours: np.ndarray, minutes: np.ndarray) -> np.ndarray:
+    """Vectorized time_to_block for arrays of hours and minutes."""
+    hours = np.asarray(hours, dtype=np.int32)
+    minutes = np.asarray(minutes, dtype=np.int32)
+    effective_hours = np.where(hours < START_HOUR, hours + 24, hours)
+    return (effective_hours - START_HOUR) * BLOCKS_PER_HOUR + minutes // 15
+
+def block_to_time(block_idx: int) -> str:
+    """Converts a block index back to HH:MM string."""
+    if 0 <= block_idx < TOTAL_BLOCKS:
+        return _BLOCK_TO_TIME_STR[block_idx]
+    return _block_to_time(block_idx)
+
 # --- Data Structures ---
 
-@dataclass
+@dataclass(slots=True)
 class Shift:
     """Represents a continuous work period for an employee."""
     start_block: int
@@ -52,7 +89,7 @@ class Shift:
     def duration(self) -> int:
         return self.end_block - self.start_block
 
-@dataclass
+@dataclass(slots=True)
 class Employee:
     """An employee with behavioral attributes."""
     id: str
@@ -62,23 +99,49 @@ class Employee:
     # New Attributes from TOML
     category: str = "standard"
     profile: str = "standard"
-    skills: List[str] = field(default_factory=list)
+    skills: FrozenSet[str] = frozenset()
     
     # Behavioral Attributes
     base_speed: float = 1.0          
     switch_cost: float = 1.0         
     fatigue_rate: float = 0.0        
-    ideal_tasks: List[str] = field(default_factory=list) 
+    ideal_tasks: FrozenSet[str] = frozenset()
+
+    # Availability bitmask: bit s set if on shift at block s (Python int, any TOTAL_BLOCKS)
+    _avail_bits: int = field(init=False, repr=False, compare=False)
+    # Entry time (first start block), 9999 if no shifts; used to sort views
+    _min_start: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # Sets for O(1) membership; lists from callers are accepted and converted
+        self.skills = frozenset(self.skills)
+        self.ideal_tasks = frozenset(self.ideal_tasks)
+        self.prepare()
+
+    def prepare(self):
+        """Rebuilds the cached availability bits. Call again after changing shifts."""
+        bits = 0
+        for shift in self.shifts:
+            start = max(0, shift.start_block)
+            if shift.end_block > start:
+                bits |= ((1 << (shift.end_block - start)) - 1) << start
+        self._avail_bits = bits
+        self._min_start = (bits & -bits).bit_length() - 1 if bits else 9999
 
     def is_available(self, block_idx: int) -> bool:
         """Checks if employee is working during a specific block."""
-        return any(shift.contains(block_idx) for shift in self.shifts)
+        return block_idx >= 0 and bool((self._avail_bits >> block_idx) & 1)
+
+    def any_available_in_range(self, lo: int, hi: int) -> bool:
+        """True if the employee is on shift at some block in [lo, hi)."""
+        lo = max(0, lo)
+        return hi > lo and bool(self._avail_bits & (((1 << (hi - lo)) - 1) << lo))
     
     def has_skill(self, skill: str) -> bool:
         if not skill: return True
         return skill in self.skills
 
-@dataclass
+@dataclass(slots=True)
 class Task:
     """A specific task that needs to be done."""
     id: str
@@ -95,115 +158,277 @@ class Task:
 
 # --- Schedule & Validation ---
 
-@dataclass
+@dataclass(slots=True)
 class ScheduleMetrics:
     total_cost: float = 0.0
-    task_progress: Dict[str, float] = field(default_factory=dict)
-    employee_costs: Dict[str, float] = field(default_factory=dict)
+    # Indexed by the Schedule's task / employee indices (see task_ids, employee_ids)
+    task_progress_arr: Optional[np.ndarray] = None
+    employee_costs_arr: Optional[np.ndarray] = None
+    task_ids: Sequence[str] = ()
+    employee_ids: Sequence[str] = ()
     warnings: List[str] = field(default_factory=list)
+    # incomplete_mask[task_idx] = True if progress < effort_required
+    incomplete_mask: Optional[np.ndarray] = None
+
+    @property
+    def task_progress(self) -> Dict[str, float]:
+        """Dict view {task_id: progress}, built on access."""
+        if self.task_progress_arr is None:
+            return {}
+        return {tid: float(v) for tid, v in zip(self.task_ids, self.task_progress_arr)}
+
+    @property
+    def employee_costs(self) -> Dict[str, float]:
+        """Dict view {employee_id: cost}, built on access."""
+        if self.employee_costs_arr is None:
+            return {}
+        return {eid: float(v) for eid, v in zip(self.employee_ids, self.employee_costs_arr)}
+
+# Explicit signature: compiled eagerly at import (and cached on disk) instead of on first call
+@njit(
+    "Tuple((f8, f8[:], f8[:], b1[:]))(i2[:, :], b1[:, :], f8[:], f8[:], f8[:], b1[:, :], f8[:], i8, i8)",
+    cache=True,
+    parallel=True,
+)
+def _compute_metrics(grid, shift_mask, base_speed, fatigue_rate, switch_cost, ideal_mask, effort_required,
+                     b_start, b_end):
+    """Per-employee cost/progress simulation over the day.
+
+    grid is [block, emp] -> task index (-1 = idle), shift_mask is [emp, block].
+    Only blocks in [b_start, b_end) are visited; nobody may be on shift outside it.
+    Returns (total_cost, employee_costs, task_progress, incomplete_mask).
+    """
+    n_emps = grid.shape[1]
+    emp_costs = np.zeros(n_emps)
+    # Employees are independent: each one writes its own row, reduced below
+    tp_local = np.zeros((n_emps, effort_required.shape[0]))
+
+    for e in prange(n_emps):
+        # Per-employee constants and accumulators hoisted out of the block loop
+        on_shift = shift_mask[e]
+        ideal = ideal_mask[e]
+        progress = tp_local[e]
+        speed = base_speed[e]
+        rate = fatigue_rate[e]
+        switch = switch_cost[e]
+        cost = 0.0
+        consecutive_blocks = 0
+        last_task = -1
+
+        for b in range(b_start, b_end):
+            if not on_shift[b]:
+                # Taking a break (off shift) resets fatigue count.
+                consecutive_blocks = 0
+                last_task = -1
+                continue
+
+            task = grid[b, e]
+            if task >= 0:
+                consecutive_blocks += 1
+
+                # Switch Cost and Profile Penalty (task not in ideal_tasks),
+                # kept branchless so LLVM can vectorize the accumulation
+                switched = (last_task != task) & (last_task >= 0)
+                non_ideal = ideal[task] == 0
+                cost += switch * switched + 0.5 * non_ideal
+                last_task = task
+
+                # Fatigue reduces speed linearly, clamped to 10%
+                fatigue_factor = max(0.1, 1.0 - rate * consecutive_blocks)
+                progress[task] += speed * fatigue_factor
+            else:
+                # On shift but IDLE: resets fatigue but adds idle cost
+                consecutive_blocks = 0
+                last_task = -1
+                cost += 0.2
+
+        emp_costs[e] = cost
+
+    task_progress = tp_local.sum(axis=0)
+    return emp_costs.sum(), emp_costs, task_progress, task_progress < effort_required
+
+if not _HAVE_NUMBA:
+    try:
+        # Prebuilt Cython kernel: python setup.py build_ext --inplace
+        from model_metrics import compute as _compute_metrics
+    except ImportError:
+        pass
+
+def _pack_bits(mask: np.ndarray) -> np.ndarray:
+    """Packs a [block, emp] bool matrix into [block, word] uint64 employee bitmaps."""
+    n_blocks, n_emps = mask.shape
+    n_words = max(1, (n_emps + 63) // 64)
+    padded = np.zeros((n_blocks, n_words * 64), dtype=np.bool_)
+    padded[:, :n_emps] = mask
+    return np.packbits(padded, axis=1, bitorder="little").view("<u8")
 
 class Schedule:
     """Holds the allocation of tasks to employees over time blocks."""
-    def __init__(self):
-        # allocation[block_idx] = { employee_id: task_id }
-        self.grid: List[Dict[str, str]] = [{} for _ in range(TOTAL_BLOCKS)]
-        
+    __slots__ = ("emp_idx", "task_idx", "task_ids", "grid", "busy_bits", "shift_bits", "_shift_mask", "_ideal_mask")
+
+    def __init__(self, employees: List[Employee], tasks: List[Task]):
+        self.emp_idx: Dict[str, int] = {e.id: i for i, e in enumerate(employees)}
+        self.task_idx: Dict[str, int] = {t.id: i for i, t in enumerate(tasks)}
+        self.task_ids: List[str] = [t.id for t in tasks]
+        # grid[block_idx, emp_idx] = task_idx (-1 = idle)
+        self.grid = np.full((TOTAL_BLOCKS, len(employees)), -1, dtype=np.int16)
+        # _shift_mask[emp_idx, block_idx] = True if on shift
+        self._shift_mask = self._build_shift_mask(employees)
+        # _ideal_mask[emp_idx, task_idx] = True if the task suits the employee's profile
+        self._ideal_mask = self._build_ideal_mask(employees, self.task_idx)
+        # Employee bitmaps per block, 64 employees per uint64 word (bit e_idx & 63 of word e_idx >> 6):
+        # busy_bits = assigned to some task, shift_bits = on shift
+        self.busy_bits = _pack_bits(self.grid >= 0)
+        self.shift_bits = _pack_bits(self._shift_mask.T)
+
+    def empty_like(self) -> "Schedule":
+        """Returns a blank Schedule for the same roster.
+
+        Index maps and masks are shared (read-only), so the only allocation
+        is the grid itself. Use when building many candidate schedules.
+        """
+        sched = Schedule.__new__(Schedule)
+        sched.emp_idx = self.emp_idx
+        sched.task_idx = self.task_idx
+        sched.task_ids = self.task_ids
+        sched.grid = np.full_like(self.grid, -1)
+        sched.busy_bits = np.zeros_like(self.busy_bits)
+        sched.shift_bits = self.shift_bits
+        sched._shift_mask = self._shift_mask
+        sched._ideal_mask = self._ideal_mask
+        return sched
+
+    @staticmethod
+    def _build_shift_mask(employees: List[Employee]) -> np.ndarray:
+        mask = np.zeros((len(employees), TOTAL_BLOCKS), dtype=np.bool_)
+        for e, emp in enumerate(employees):
+            for shift in emp.shifts:
+                mask[e, max(0, shift.start_block):shift.end_block] = True
+        return mask
+
+    @staticmethod
+    def _build_ideal_mask(employees: List[Employee], task_idx: Dict[str, int]) -> np.ndarray:
+        # Employees without preferences treat every task as ideal
+        mask = np.ones((len(employees), len(task_idx)), dtype=np.bool_)
+        for e, emp in enumerate(employees):
+            if emp.ideal_tasks:
+                mask[e] = False
+                for tid in emp.ideal_tasks:
+                    if tid in task_idx:
+                        mask[e, task_idx[tid]] = True
+        return mask
+
     def assign(self, block_idx: int, employee: Employee, task: Task):
         """Assigns a task to an employee for a specific block."""
         if not (0 <= block_idx < TOTAL_BLOCKS):
             raise ValueError(f"Block {block_idx} out of range.")
         
-        if not employee.is_available(block_idx):
+        e_idx = self.emp_idx[employee.id]
+        t_idx = self.task_idx[task.id]
+
+        if not self._shift_mask[e_idx, block_idx]:
             raise ValueError(f"Employee {employee.name} is not on shift at {block_to_time(block_idx)}")
 
-        if employee.id in self.grid[block_idx]:
-            current_task = self.grid[block_idx][employee.id]
+        row = self.grid[block_idx]
+        if row[e_idx] >= 0:
+            current_task = self.task_ids[row[e_idx]]
             raise ValueError(f"Employee {employee.name} already assigned to {current_task} at {block_to_time(block_idx)}")
 
-        for emp_id, t_id in self.grid[block_idx].items():
-            if t_id == task.id:
-                 raise ValueError(f"Task {task.name} is already being worked on by {emp_id} at {block_to_time(block_idx)}")
+        # Single vectorized compare over the block's row instead of a per-employee scan
+        if (row == t_idx).any():
+            emp_id = list(self.emp_idx)[int(np.flatnonzero(row == t_idx)[0])]
+            raise ValueError(f"Task {task.name} is already being worked on by {emp_id} at {block_to_time(block_idx)}")
+
+        row[e_idx] = t_idx
+        self.busy_bits[block_idx, e_idx >> 6] |= np.uint64(1 << (e_idx & 63))
+
+    def assign_many(self, start_block: int, count: int, employee: Employee, task: Task):
+        """Assigns a task to an employee for `count` consecutive blocks from start_block.
 
-        self.grid[block_idx][employee.id] = task.id
+        Same rules as assign(), validated once over the whole range.
+        """
+        end_block = start_block + count
+        if not (0 <= start_block and count > 0 and end_block <= TOTAL_BLOCKS):
+            raise ValueError(f"Blocks {start_block}-{end_block} out of range.")
+
+        e_idx = self.emp_idx[employee.id]
+        t_idx = self.task_idx[task.id]
+        blocks = slice(start_block, end_block)
+
+        off_shift = np.flatnonzero(~self._shift_mask[e_idx, blocks])
+        if off_shift.size:
+            raise ValueError(f"Employee {employee.name} is not on shift at {block_to_time(start_block + off_shift[0])}")
+
+        busy = np.flatnonzero(self.grid[blocks, e_idx] >= 0)
+        if busy.size:
+            b = start_block + busy[0]
+            current_task = self.task_ids[self.grid[b, e_idx]]
+            raise ValueError(f"Employee {employee.name} already assigned to {current_task} at {block_to_time(b)}")
+
+        taken = np.argwhere(self.grid[blocks] == t_idx)
+        if taken.size:
+            b, other = start_block + taken[0][0], list(self.emp_idx)[taken[0][1]]
+            raise ValueError(f"Task {task.name} is already being worked on by {other} at {block_to_time(b)}")
+
+        self.grid[blocks, e_idx] = t_idx
+        self.busy_bits[blocks, e_idx >> 6] |= np.uint64(1 << (e_idx & 63))
+
+    def refresh_busy_bits(self):
+        """Rebuilds busy_bits after writing to grid directly (e.g. from a solver)."""
+        self.busy_bits = _pack_bits(self.grid >= 0)
+
+    def staffing_level(self, block_idx: int) -> int:
+        """Number of employees assigned to some task at block_idx."""
+        return sum(int(word).bit_count() for word in self.busy_bits[block_idx])
 
     def calculate_metrics(self, employees: List[Employee], tasks: List[Task]) -> ScheduleMetrics:
-        metrics = ScheduleMetrics()
-        metrics.task_progress = {t.id: 0.0 for t in tasks}
-        metrics.employee_costs = {e.id: 0.0 for e in employees}
-        
-        task_map = {t.id: t for t in tasks}
+        # Flatten the roster into typed arrays for the compiled kernel
+        cols = [self.emp_idx[e.id] for e in employees]
+        grid = self.grid[:, cols]
+        shift_mask = self._shift_mask[cols]
+        base_speed = np.array([e.base_speed for e in employees], dtype=np.float64)
+        fatigue_rate = np.array([e.fatigue_rate for e in employees], dtype=np.float64)
+        switch_cost = np.array([e.switch_cost for e in employees], dtype=np.float64)
 
-        for emp in employees:
-            consecutive_blocks = 0
-            last_task_id = None
-            
-            # Iterate through the entire day to track state
-            for b in range(TOTAL_BLOCKS):
-                task_id = self.grid[b].get(emp.id)
-                
-                # Check if on shift
-                on_shift = emp.is_available(b)
-                
-                if not on_shift:
-                    consecutive_blocks = 0 # Reset fatigue if off shift? 
-                    # Simplicity: taking a break (off shift) resets fatigue count.
-                    last_task_id = None
-                    continue
-                
-                # On shift logic
-                if task_id:
-                    # 1. State Update
-                    consecutive_blocks += 1
-                    
-                    # 2. Switch Cost
-                    if last_task_id is not None and task_id != last_task_id:
-                        cost = emp.switch_cost
-                        metrics.employee_costs[emp.id] += cost
-                        metrics.total_cost += cost
-                        # metrics.warnings.append(f"Switch cost for {emp.name} at {block_to_time(b)}")
-                    
-                    last_task_id = task_id
-
-                    # 3. Progress Calculation (Effective Speed)
-                    # Fatigue reduces speed linearly: speed * (1 - rate * count)
-                    # Minimum speed clamped to 10% to prevent negative
-                    fatigue_factor = max(0.1, 1.0 - (emp.fatigue_rate * consecutive_blocks))
-                    effective_speed = emp.base_speed * fatigue_factor
-                    
-                    metrics.task_progress[task_id] += effective_speed
-                    
-                    # 4. Profile Penalty (if task not in ideal_tasks)
-                    if emp.ideal_tasks and task_id not in emp.ideal_tasks:
-                        # Penalty for doing non-ideal task
-                        pen = 0.5 # Arbitrary constant
-                        metrics.employee_costs[emp.id] += pen
-                        metrics.total_cost += pen
-
-                else:
-                    # On shift but IDLE
-                    # Reset consecutive work? Or does waiting tire you out?
-                    # Let's say idle resets physical fatigue but adds 'Idle Cost'
-                    consecutive_blocks = 0 
-                    last_task_id = None
-                    
-                    idle_cost = 0.2 # Arbitrary idle penalty
-                    metrics.employee_costs[emp.id] += idle_cost
-                    metrics.total_cost += idle_cost
-
-        return metrics
+        ideal_mask = self._ideal_mask[cols]
+        effort_required = np.zeros(len(self.task_ids), dtype=np.float64)
+        for t in tasks:
+            effort_required[self.task_idx[t.id]] = t.effort_required
+
+        # Skip the leading/trailing blocks where nobody is on shift
+        active = np.flatnonzero(shift_mask.any(axis=0))
+        b_start, b_end = (int(active[0]), int(active[-1]) + 1) if active.size else (0, 0)
+
+        total_cost, emp_costs, task_progress, incomplete_mask = _compute_metrics(
+            grid, shift_mask, base_speed, fatigue_rate, switch_cost, ideal_mask, effort_required,
+            b_start, b_end,
+        )
+
+        return ScheduleMetrics(
+            total_cost=float(total_cost),
+            task_progress_arr=task_progress,
+            employee_costs_arr=emp_costs,
+            task_ids=self.task_ids,
+            employee_ids=[e.id for e in employees],
+            incomplete_mask=incomplete_mask,
+        )
 
     def validate_overall(self, tasks: List[Task], metrics: ScheduleMetrics = None) -> List[str]:
         errors = []
         # If metrics not provided, we can't accept it easily without recalculating, 
         # but let's assume usage pattern is calculate -> validate.
-        if not metrics:
+        if not metrics or metrics.incomplete_mask is None:
              errors.append("Metrics not calculated properly.")
              return errors
 
-        for task in tasks:
-            progress = metrics.task_progress.get(task.id, 0)
-            if progress < task.effort_required:
-                errors.append(f"Task {task.name} incomplete: {progress:.2f}/{task.effort_required} units.")
+        # Completion was already checked by calculate_metrics; only format the failures
+        tasks_by_idx = {self.task_idx[t.id]: t for t in tasks}
+        for t_idx in np.flatnonzero(metrics.incomplete_mask):
+            task = tasks_by_idx.get(t_idx)
+            if task is None:
+                continue
+            progress = metrics.task_progress_arr[t_idx]
+            errors.append(f"Task {task.name} incomplete: {progress:.2f}/{task.effort_required} units.")
             # We allow over-completion? Maybe warn?
             # elif progress > task.effort_required + 0.5: # Tolerance
             #    errors.append(f"Task {task.name} over-done.")
@@ -213,14 +438,8 @@ class Schedule:
     def to_string(self, employees: List[Employee]) -> str:
         """Returns a string representation of the schedule."""
         
-        # Helper to find start block
-        def get_start_block(emp):
-            if not emp.shifts: return 9999
-            # Assuming shifts are sorted or we take min
-            return min(s.start_block for s in emp.shifts)
-
         # Sort employees by entry time
-        sorted_employees = sorted(employees, key=get_start_block)
+        sorted_employees = sorted(employees, key=lambda e: e._min_start)
         
         lines = ["Schedule Visualization:"]
         
@@ -229,26 +448,61 @@ class Schedule:
         lines.append(header)
         lines.append("-" * len(header))
 
-        for b in range(TOTAL_BLOCKS):
-            time_str = block_to_time(b)
-            row = f"{time_str}  | "
-            
-            # Optimization: skip rows where NO ONE is working?
-            # Or keep all to show full day. Let's keep all.
-            
-            # Check if this row has ANY activity or just empty/vazio?
-            # User wants to see the schedule, so standard view is fine.
-            
-            for e in sorted_employees:
-                task_id = self.grid[b].get(e.id, "")
-                if not e.is_available(b):
-                    cell = "     " # Blank for not on shift
-                elif task_id:
-                    cell = f"{task_id[:5]:^5}"
-                else:
-                    cell = "Vazio" # Was Livre
-                
-                row += f"{cell} | "
-            lines.append(row)
+        # Label table: 0 = off shift, 1 = idle, 2 + task_idx = task
+        labels = np.array(["     ", "Vazio"] + [f"{tid[:5]:^5}" for tid in self.task_ids], dtype=object)
+        cols = [self.emp_idx[e.id] for e in sorted_employees]
+        codes = np.where(self._shift_mask[cols].T, self.grid[:, cols] + 2, 0)
+        cells = labels[codes]
+
+        # Skip rows where nobody is on shift or working (e.g. after closing).
+        shown = np.flatnonzero((self.busy_bits | self.shift_bits).any(axis=1))
+        times = _BLOCK_TO_TIME_STR
+        lines.extend(f"{times[b]}  | " + "".join(f"{cell} | " for cell in cells[b]) for b in shown)
             
         return "\n".join(lines)
+
+# --- Solver Preprocessing ---
+
+@njit("b1[:, :, :](b1[:, :], b1[:, :], i8[:], b1[:, :])", cache=True, parallel=True)
+def _allowed_kernel(shift_mask, emp_skills, task_skill, needed):
+    """allowed[e, t, s] = on shift & skilled (task_skill -1 = none needed) & needed[t, s]."""
+    n_emps, n_blocks = shift_mask.shape
+    n_tasks = task_skill.shape[0]
+    allowed = np.zeros((n_emps, n_tasks, n_blocks), dtype=np.bool_)
+    for e in prange(n_emps):
+        for t in range(n_tasks):
+            k = task_skill[t]
+            if k >= 0 and not emp_skills[e, k]:
+                continue
+            for s in range(n_blocks):
+                allowed[e, t, s] = shift_mask[e, s] & needed[t, s]
+    return allowed
+
+def build_allowed_mask(employees: List[Employee], tasks: List[Task]) -> np.ndarray:
+    """[emp, task, block] bool: employee may do the task at that block.
+
+    On shift, has the skill and, for fixed tasks, the demand curve is > 0.
+    """
+    skill_ids: Dict[str, int] = {}
+    task_skill = np.full(len(tasks), -1, dtype=np.int64)
+    needed = np.ones((len(tasks), TOTAL_BLOCKS), dtype=np.bool_)
+    for t, task in enumerate(tasks):
+        if task.skill_needed:
+            task_skill[t] = skill_ids.setdefault(task.skill_needed, len(skill_ids))
+        if task.is_fixed():
+            curve = np.zeros(TOTAL_BLOCKS, dtype=np.int64)
+            n = min(len(task.demand_curve), TOTAL_BLOCKS)
+            curve[:n] = task.demand_curve[:n]
+            needed[t] = curve > 0
+
+    emp_skills = np.zeros((len(employees), max(1, len(skill_ids))), dtype=np.bool_)
+    for e, emp in enumerate(employees):
+        for skill in emp.skills:
+            if skill in skill_ids:
+                emp_skills[e, skill_ids[skill]] = True
+
+    return _allowed_kernel(Schedule._build_shift_mask(employees), emp_skills, task_skill, needed)
+
+def build_ideal_mask(employees: List[Employee], tasks: List[Task]) -> np.ndarray:
+    """[emp, task] bool: task suits the employee (all tasks do if ideal_tasks is empty)."""
+    return Schedule._build_ideal_mask(employees, {t.id: i for i, t in enumerate(tasks)})
@@ -0,0 +1,67 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
+"""Cython build of model._compute_metrics, used when Numba is not installed.
+
+Build in place with: python setup.py build_ext --inplace
+"""
+import numpy as np
+
+
+def compute(grid, shift_mask, base_speed, fatigue_rate, switch_cost, ideal_mask, effort_required,
+            Py_ssize_t b_start, Py_ssize_t b_end):
+    """Same contract as model._compute_metrics.
+
+    grid is [block, emp] -> task index (-1 = idle), shift_mask is [emp, block].
+    Returns (total_cost, employee_costs, task_progress, incomplete_mask).
+    """
+    cdef const short[:, :] g = grid
+    cdef const unsigned char[:, :] on_shift = shift_mask.view(np.uint8)
+    cdef const unsigned char[:, :] ideal = ideal_mask.view(np.uint8)
+    cdef const double[:] speed = base_speed
+    cdef const double[:] rate = fatigue_rate
+    cdef const double[:] switch = switch_cost
+
+    cdef Py_ssize_t n_emps = g.shape[1]
+    emp_costs_arr = np.zeros(n_emps)
+    task_progress_arr = np.zeros(effort_required.shape[0])
+    cdef double[:] emp_costs = emp_costs_arr
+    cdef double[:] progress = task_progress_arr
+
+    cdef Py_ssize_t e, b
+    cdef short task, last_task
+    cdef int consecutive_blocks
+    cdef double cost, fatigue_factor
+
+    for e in range(n_emps):
+        cost = 0.0
+        consecutive_blocks = 0
+        last_task = -1
+
+        for b in range(b_start, b_end):
+            if not on_shift[e, b]:
+                # Taking a break (off shift) resets fatigue count.
+                consecutive_blocks = 0
+                last_task = -1
+                continue
+
+            task = g[b, e]
+            if task >= 0:
+                consecutive_blocks += 1
+
+                # Switch Cost and Profile Penalty (task not in ideal_tasks)
+                cost += switch[e] * ((last_task != task) & (last_task >= 0)) + 0.5 * (ideal[e, task] == 0)
+                last_task = task
+
+                # Fatigue reduces speed linearly, clamped to 10%
+                fatigue_factor = 1.0 - rate[e] * consecutive_blocks
+                if fatigue_factor < 0.1:
+                    fatigue_factor = 0.1
+                progress[task] += speed[e] * fatigue_factor
+            else:
+                # On shift but IDLE: resets fatigue but adds idle cost
+                consecutive_blocks = 0
+                last_task = -1
+                cost += 0.2
+
+        emp_costs[e] = cost
+
+    return emp_costs_arr.sum(), emp_costs_arr, task_progress_arr, task_progress_arr < effort_required
@@ -1,45 +1,267 @@
+import os
+from fractions import Fraction
+
+import numpy as np
 from ortools.sat.python import cp_model
 from typing import List, Dict, Tuple, Optional
-from model import Employee, Task, Shift, TOTAL_BLOCKS, block_to_time, Schedule
+from model import Employee, Task, Shift, TOTAL_BLOCKS, block_to_time, Schedule, build_allowed_mask, build_ideal_mask
+
+# Max number of separate work periods ("legs") per employee on one flexible task, per shift
+LEGS_PER_SHIFT = 2
 
 class TaskOptimizer:
-    def __init__(self, employees: List[Employee], tasks: List[Task]):
+    """Dense model: one variable per (employee group, task, block).
+
+    Identical employees are merged into one unit whose cells count how many
+    of them do the task (a Boolean for singletons); the schedule is expanded
+    back to individual employees after the solve.
+    """
+
+    def __init__(self, employees: List[Employee], tasks: List[Task], log_search: bool = False,
+                 hint: bool = True, solver: Optional[cp_model.CpSolver] = None):
         self.employees = employees
         self.tasks = tasks
+        self.log_search = log_search
+        # Warm-start the search from a greedy schedule (see _greedy_grid)
+        self.hint = hint
         self.model = cp_model.CpModel()
-        self.solver = cp_model.CpSolver()
+        # A solver may be shared across optimizers (e.g. one per day); solve() resets its parameters
+        self.solver = solver if solver is not None else cp_model.CpSolver()
+        
+        # Units: lists of employee indices solved as one (see _employee_units)
+        self.units = []
+        self.unit_size = None
         
         # Variables
-        # x[e_idx, t_idx, s] = 1 if employee e assigns task t at block s
-        self.x = {} 
+        # x[u_idx, t_idx, s] = number of unit u's employees doing task t at block s
+        # Object array allocated in solve(); None where no variable exists (counts as 0)
+        self.x = None
+        self.x_index = None
+        # allowed[u_idx, t_idx, s], precomputed once in solve()
+        self.allowed = None
+        # ideal[u_idx, t_idx] = task suits the unit's profile (no preference penalty)
+        self.ideal = None
+        # Fixed-task blocks whose demand exceeds the eligible staff (found while building)
+        self.shortfalls = []
         
     def solve(self) -> Optional[Schedule]:
-        # 1. Variables Definition
-        e_range = range(len(self.employees))
+        self.units = self._employee_units()
+        self.unit_size = np.array([len(members) for members in self.units], dtype=np.int64)
+        e_range = range(len(self.units))
         t_range = range(len(self.tasks))
         s_range = range(TOTAL_BLOCKS)
+
+        # Unit members are identical, so the first one stands for the unit
+        reps = [members[0] for members in self.units]
+        emp_allowed = build_allowed_mask(self.employees, self.tasks)
+        emp_ideal = build_ideal_mask(self.employees, self.tasks)
+        self.allowed = emp_allowed[reps]
+        self.ideal = emp_ideal[reps]
+        self.x = np.full(self.allowed.shape, None, dtype=object)
+        self._build_model(e_range, t_range, s_range)
+        # Model index of every x cell (-1 = no variable), to read the solution in bulk
+        self.x_index = np.full(self.x.shape, -1, dtype=np.int64)
+        for idx, x in np.ndenumerate(self.x):
+            if x is not None:
+                self.x_index[idx] = x.Index()
+        if self.shortfalls:
+            # Provably infeasible: report why instead of running the search
+            for msg in self.shortfalls:
+                print(msg)
+            print("No solution found.")
+            return None
+        if self.hint:
+            self._add_hints(self._greedy_grid(emp_allowed, emp_ideal))
+
+        # 4. Solvers
+        # To find OPTIMAL, we need more time or parallel search.
+        # FEASIBLE means it hit the time limit or was happy enough.
+        params = self.solver.parameters
+        params.max_time_in_seconds = 300.0 # Give it 5 minutes
+        params.num_search_workers = os.cpu_count() or 8 # Use every core
+        params.symmetry_level = 2 # Detect remaining symmetries in presolve and search
+        params.linearization_level = 2 # Full LP relaxation of the assignment sums
+        params.cp_model_presolve = True
+        params.relative_gap_limit = 0.01 # Stop within 1% of the best bound
+        params.log_search_progress = self.log_search
+        status = self.solver.Solve(self.model)
         
-        # x[e, t, s]
+        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            print(f"Solution Found: {self.solver.StatusName(status)}")
+            print(f"Objective Value: {self.solver.ObjectiveValue()}")
+            return self._build_schedule_from_solution(e_range, t_range, s_range)
+        else:
+            print("No solution found.")
+            return None
+
+    def _greedy_grid(self, emp_allowed: np.ndarray, emp_ideal: np.ndarray) -> np.ndarray:
+        """Quick heuristic schedule, [block, emp] -> task index (-1 = idle), used as a hint.
+
+        Fixed-task demand is covered first, keeping whoever held the task in the
+        previous block; flexible tasks then go by priority to ideal, faster
+        employees, earliest free blocks first. It may fall short; hints are partial.
+        """
+        grid = np.full((TOTAL_BLOCKS, len(self.employees)), -1, dtype=np.int16)
+
+        for t, task_obj in enumerate(self.tasks):
+            if not task_obj.is_fixed():
+                continue
+            demand_curve = task_obj.demand_curve
+            for s in range(min(len(demand_curve), TOTAL_BLOCKS)):
+                demand = demand_curve[s]
+                if demand <= 0:
+                    continue
+                free = np.flatnonzero(emp_allowed[:, t, s] & (grid[s] < 0)).tolist()
+                free.sort(key=lambda e: (s == 0 or grid[s - 1, e] != t, not emp_ideal[e, t]))
+                grid[s, free[:demand]] = t
+
+        flexible = [t for t, task_obj in enumerate(self.tasks) if not task_obj.is_fixed()]
+        for t in sorted(flexible, key=lambda t: self.tasks[t].priority):
+            remaining = int(self.tasks[t].effort_required)
+            candidates = sorted(
+                range(len(self.employees)),
+                key=lambda e: (not emp_ideal[e, t], -self.employees[e].base_speed, self.employees[e].name),
+            )
+            for e in candidates:
+                if remaining <= 0:
+                    break
+                blocks = np.flatnonzero(emp_allowed[e, t] & (grid[:, e] < 0))[:remaining]
+                grid[blocks, e] = t
+                remaining -= len(blocks)
+        return grid
+
+    def _add_hints(self, grid: np.ndarray):
+        """Hints every x cell with the unit's head count on that task in grid."""
+        for u, members in enumerate(self.units):
+            unit_grid = grid[:, members]
+            for (t, s), x in np.ndenumerate(self.x[u]):
+                if x is not None:
+                    self.model.AddHint(x, int((unit_grid[s] == t).sum()))
+
+    def _allowed_blocks(self, e: int, t: int) -> List[int]:
+        """Blocks where employee e may do task t: on shift, skilled and (fixed tasks) demanded."""
+        return np.flatnonzero(self.allowed[e, t]).tolist()
+
+    @staticmethod
+    def _present(cells: np.ndarray) -> List:
+        """Variables in a slice of x, skipping the None (no variable) entries."""
+        return [v for v in cells.ravel().tolist() if v is not None]
+
+    def _add_demand(self, e_range, t: int, s: int, demand: int):
+        """Staffing of fixed task t at block s, in the tightest form the cell allows."""
+        present = [u for u in e_range if self.x[u, t, s] is not None]
+        cell = [self.x[u, t, s] for u in present]
+        eligible = int(self.unit_size[present].sum())
+        if eligible < demand:
+            self.shortfalls.append(
+                f"Demand cannot be met: {self.tasks[t].name} at {block_to_time(s)} "
+                f"needs {demand}, only {eligible} eligible."
+            )
+        elif eligible > len(cell):
+            # Some cells are group counts, not Booleans
+            self.model.Add(cp_model.LinearExpr.Sum(cell) >= demand)
+        elif len(cell) == demand:
+            # Everyone eligible must be on it
+            self.model.AddBoolAnd(cell)
+        elif demand == 1:
+            self.model.AddBoolOr(cell)
+        else:
+            self.model.Add(cp_model.LinearExpr.Sum(cell) >= demand)
+
+    def _employee_groups(self) -> List[List[int]]:
+        """Employee indices grouped by everything the model sees (skills, shifts, profile, costs)."""
+        groups = {}
+        for e, emp_obj in enumerate(self.employees):
+            key = (
+                frozenset(emp_obj.skills),
+                tuple((shift.start_block, shift.end_block) for shift in emp_obj.shifts),
+                emp_obj.profile,
+                emp_obj.category,
+                frozenset(emp_obj.ideal_tasks),
+                emp_obj.base_speed,
+                emp_obj.switch_cost,
+                emp_obj.fatigue_rate,
+            )
+            groups.setdefault(key, []).append(e)
+        return list(groups.values())
+
+    def _interchangeable_groups(self) -> List[List[int]]:
+        return [members for members in self._employee_groups() if len(members) > 1]
+
+    def _employee_units(self) -> List[List[int]]:
+        """Employees solved as one unit: every group of identical employees."""
+        return self._employee_groups()
+
+    def _workload_terms(self, e: int) -> List:
+        """Variables summing to the number of blocks employee e works."""
+        return self._present(self.x[e])
+
+    def _add_symmetry_breaking(self):
+        # Swapping two interchangeable employees keeps cost and feasibility,
+        # so order them by workload: e_i works at least as many blocks as e_{i+1}.
+        for members in self._interchangeable_groups():
+            loads = [cp_model.LinearExpr.Sum(self._workload_terms(e)) for e in members]
+            for a, b in zip(loads, loads[1:]):
+                self.model.Add(a >= b)
+
+    def _add_start_terms(self, e, t_range, cost_weight, obj_vars, obj_coefs):
+        """Switch cost for employee e: one literal per task-segment start.
+
+        A cell whose predecessor block has no variable is its own start literal,
+        so start_vars are only created where both x[s-1] and x[s] exist.
+
+        Starts stay per task on purpose: a single transition literal per (e, s)
+        (state[e, s] != state[e, s-1], as an automaton would count them) is
+        exact but its LP relaxation is much weaker, and the dense solve slows
+        down several times. IntervalTaskOptimizer counts segments natively,
+        one presence literal per leg.
+        """
+        for t in t_range:
+            for s in range(1, TOTAL_BLOCKS):
+                x = self.x[e, t, s]
+                if x is None:
+                    continue
+                prev = self.x[e, t, s - 1]
+                if prev is None:
+                    obj_vars.append(x)
+                else:
+                    # start_var >= x[s] - x[s-1] (a count for merged employees)
+                    start_var = self._new_cell_var(e, f"start_e{e}_t{t}_s{s}")
+                    self.model.Add(start_var >= x - prev)
+                    obj_vars.append(start_var)
+                obj_coefs.append(cost_weight)
+
+    @staticmethod
+    def _priority_coefs(task_obj: Task) -> np.ndarray:
+        """Per-block cost of a flexible task: int(s * 0.1 * weight)."""
+        # Priority Weight: 20.0 / priority
+        # Prio 1 -> Weight 20, Prio 4 -> Weight 5
+        time_penalty_weight = 20.0 / max(1, task_obj.priority)
+        return (np.arange(TOTAL_BLOCKS) * 0.1 * time_penalty_weight).astype(np.int64)
+
+    def _new_cell_var(self, e: int, name: str):
+        """Boolean for a single employee, 0..n count for a unit of n identical ones."""
+        size = int(self.unit_size[e])
+        return self.model.NewBoolVar(name) if size == 1 else self.model.NewIntVar(0, size, name)
+
+    def _build_model(self, e_range, t_range, s_range):
+        # 1. Variables Definition
+        # x[e, t, s] over units e, created only for allowed triples: availability, skills and
+        # zero-demand blocks are structural, so empty (None) cells simply count as 0.
         for e in e_range:
             for t in t_range:
-                for s in s_range:
-                    self.x[(e, t, s)] = self.model.NewBoolVar(f"x_e{e}_t{t}_s{s}")
+                for s in self._allowed_blocks(e, t):
+                    self.x[e, t, s] = self._new_cell_var(e, f"x_e{e}_t{t}_s{s}")
 
         # 2. Hard Constraints
 
-        # A. Availability: Employee can only work if they have a shift containing block s
-        for e in e_range:
-            emp_obj = self.employees[e]
-            for s in s_range:
-                if not emp_obj.is_available(s):
-                    # Force all task vars to 0 for this block
-                    for t in t_range:
-                        self.model.Add(self.x[(e, t, s)] == 0)
-
         # B. Employee Exclusivity: At most 1 task per employee per block
+        # (at most n tasks, counted with multiplicity, for a unit of n)
         for e in e_range:
             for s in s_range:
-                self.model.Add(sum(self.x[(e, t, s)] for t in t_range) <= 1)
+                cell = self._present(self.x[e, :, s])
+                if len(cell) > 1:
+                    self.model.Add(cp_model.LinearExpr.Sum(cell) <= int(self.unit_size[e]))
 
         # C. Task Capacity / Demand
         for t in t_range:
@@ -55,20 +277,15 @@ class TaskOptimizer:
                     
                     if demand > 0:
                         # Sum of assigned employees >= demand
-                        self.model.Add(sum(self.x[(e, t, s)] for e in e_range) >= demand)
-                    else:
-                        # If demand is 0, should we force 0 assignment?
-                        # Usually yes, unless it's 'optional' over-staffing.
-                        # For 'Caixa', 0 demand means closed or no need?
-                        # Let's enforce 0 to be clean, or allow it?
-                        # Enforcing 0 prevents ghost working.
-                        self.model.Add(sum(self.x[(e, t, s)] for e in e_range) == 0)
+                        self._add_demand(e_range, t, s, demand)
+                    # Zero demand: no variables exist, which prevents ghost working.
 
             else:
                 # --- FLEXIBLE TASK (e.g. Reposicao) ---
                 # 1. Total Volume Requirement
                 required_blocks = int(task_obj.effort_required)
-                self.model.Add(sum(self.x[(e, t, s)] for e in e_range for s in s_range) == required_blocks)
+                volume = self._present(self.x[:, t, :])
+                self.model.Add(cp_model.LinearExpr.Sum(volume) == required_blocks)
                 
                 # 2. Exclusivity (Single Worker per Task?)
                 # "Reposição de Mercearia" -> can 2 people do it?
@@ -78,56 +295,30 @@ class TaskOptimizer:
                 # Given the scale, assuming parallel work is allowed.
                 pass
 
-        # D. Skill Requirements
-        for t in t_range:
-            task_obj = self.tasks[t]
-            if not task_obj.skill_needed:
-                continue
-                
-            for e in e_range:
-                emp_obj = self.employees[e]
-                if not emp_obj.has_skill(task_obj.skill_needed):
-                    # Cannot do this task ever
-                    for s in s_range:
-                        self.model.Add(self.x[(e, t, s)] == 0)
+        # Interchangeable employees are already merged into units: no symmetry left to break
 
 
         # 3. Objective Function (Soft Constraints & Costs)
-        total_cost = 0
+        # Objective terms are collected as flat (var, coef) lists and summed once
+        obj_vars, obj_coefs = [], []
 
         # A. Preference / Capability Cost
-        for e in e_range:
-            emp_obj = self.employees[e]
-            for t in t_range:
-                task_obj = self.tasks[t]
-                
-                # Check preference
-                is_ideal = (task_obj.id in emp_obj.ideal_tasks) if emp_obj.ideal_tasks else True
-                
-                # Base penalty
-                penalty = 0 if is_ideal else 5
-                
-                if penalty > 0:
-                    for s in s_range:
-                        total_cost += self.x[(e, t, s)] * penalty
+        # Base penalty per block, only for (unit, task) pairs outside the profile
+        penalty = 5
+        for e, t in np.argwhere(~self.ideal).tolist():
+            cells = self._present(self.x[e, t])
+            obj_vars.extend(cells)
+            obj_coefs.extend([penalty] * len(cells))
 
         # B. Switching Costs (Continuity)
         for e in e_range:
-            emp_obj = self.employees[e]
+            emp_obj = self.employees[self.units[e][0]]
             if emp_obj.switch_cost <= 0:
                 continue
             
             # Weighted switch cost
             cost_weight = int(emp_obj.switch_cost * 100)
-            
-            for s in range(1, TOTAL_BLOCKS):
-                for t in t_range:
-                    # Penalize starting a task segment
-                    # start_var >= x[s] - x[s-1]
-                    start_var = self.model.NewBoolVar(f"start_e{e}_t{t}_s{s}")
-                    self.model.Add(start_var >= self.x[(e, t, s)] - self.x[(e, t, s-1)])
-                    
-                    total_cost += start_var * cost_weight
+            self._add_start_terms(e, t_range, cost_weight, obj_vars, obj_coefs)
 
         # C. Priority Scheduling (High Priority Flexible Tasks -> Early)
         for t in t_range:
@@ -135,46 +326,313 @@ class TaskOptimizer:
             if task_obj.is_fixed():
                 continue 
                 
-            # Priority Weight: 20.0 / priority
-            # Prio 1 -> Weight 20, Prio 4 -> Weight 5
-            time_penalty_weight = 20.0 / max(1, task_obj.priority)
-            
+            # Cost += x[e,t,s] * coef[s]
+            coef = self._priority_coefs(task_obj)
+
             for e in e_range:
-                for s in s_range:
-                    # Cost += x[e,t,s] * s * weight
-                    scaled_s = s * 0.1 
-                    total_cost += self.x[(e, t, s)] * int(scaled_s * time_penalty_weight)
+                # Zero-cost blocks (the first few) are left out of the objective
+                blocks = np.flatnonzero(self.allowed[e, t] & (coef > 0))
+                obj_vars.extend(self.x[e, t, blocks].tolist())
+                obj_coefs.extend(coef[blocks].tolist())
 
         # Minimize
-        self.model.Minimize(total_cost)
+        self.model.Minimize(cp_model.LinearExpr.WeightedSum(obj_vars, obj_coefs))
 
-        # 4. Solvers
-        # To find OPTIMAL, we need more time or parallel search.
-        # FEASIBLE means it hit the time limit or was happy enough.
-        self.solver.parameters.max_time_in_seconds = 300.0 # Give it 5 minutes
-        self.solver.parameters.num_search_workers = 8 # Use multi-core
-        status = self.solver.Solve(self.model)
-        
-        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
-            print(f"Solution Found: {self.solver.StatusName(status)}")
-            print(f"Objective Value: {self.solver.ObjectiveValue()}")
-            return self._build_schedule_from_solution(e_range, t_range, s_range)
-        else:
-            print("No solution found.")
-            return None
+    def _solution_values(self) -> np.ndarray:
+        """Values of all model variables in one call, indexed by var.Index()."""
+        return np.array(self.solver.ResponseProto().solution, dtype=np.int64)
+
+    def _x_values(self, solution: np.ndarray) -> np.ndarray:
+        """x cube of solved values (0 where no variable exists)."""
+        return np.where(self.x_index >= 0, solution[self.x_index], 0)
 
     def _build_schedule_from_solution(self, e_range, t_range, s_range) -> Schedule:
-        sched = Schedule()
+        sched = Schedule(self.employees, self.tasks)
+        x_values = self._x_values(self._solution_values())
+        
+        # Direct assignment bypassing strict checking (as we trust the solver)
+        # We just populate the grid.
+        # Note: Sched.grid is [block, emp_idx] -> task_idx
+        for u in e_range:
+            # Expand unit counts to employees, in name order. Whoever did a task
+            # at s-1 keeps it while the count allows, so each employee starts
+            # exactly the segments the model paid for.
+            members = sorted(self.units[u], key=lambda e: self.employees[e].name)
+            current = dict.fromkeys(members, -1)
+            for s in s_range:
+                cell = x_values[u, :, s]
+                counts = {t: int(cell[t]) for t in np.flatnonzero(cell).tolist()}
+                free = []
+                for e in members:
+                    t = current[e]
+                    if counts.get(t, 0) > 0:
+                        counts[t] -= 1
+                        sched.grid[s, e] = t
+                    else:
+                        current[e] = -1
+                        free.append(e)
+                for t, n in counts.items():
+                    for e in free[:n]:
+                        current[e] = t
+                        sched.grid[s, e] = t
+                    free = free[n:]
         
+        sched.refresh_busy_bits()
+        return sched
+
+
+class IntervalTaskOptimizer(TaskOptimizer):
+    """Interval model: flexible tasks are done in optional "legs" (IntervalVars).
+
+    Each (employee, flexible task) pair gets up to LEGS_PER_SHIFT legs per shift,
+    with AddNoOverlap per employee instead of per-block exclusivity sums, and the
+    switch cost is one literal per leg. Fixed tasks (demand curves) keep one
+    Boolean per block, as unit-size optional intervals in the same NoOverlap.
+    The model stays small as rosters grow; on small rosters the dense
+    TaskOptimizer usually proves optimality faster. The objective is the same
+    cost as TaskOptimizer's, so the two reported values are comparable.
+    """
+
+    def __init__(self, employees: List[Employee], tasks: List[Task], log_search: bool = False,
+                 hint: bool = True, solver: Optional[cp_model.CpSolver] = None):
+        super().__init__(employees, tasks, log_search, hint, solver)
+        # x[e_idx, t_idx, s] = 1 if employee e does FIXED task t at block s
+        # legs[e_idx, t_idx] = [(start, size, end, presence), ...] for FLEXIBLE task t
+        self.legs = {}
+
+    def _employee_units(self) -> List[List[int]]:
+        # Legs and NoOverlap are per employee; interchangeable ones are ordered instead
+        return [[e] for e in range(len(self.employees))]
+
+    def _add_hints(self, grid: np.ndarray):
+        """Hints fixed cells as usual and each flexible task's legs with the grid's runs."""
+        super()._add_hints(grid)
+        for (e, t), legs in self.legs.items():
+            on_task = np.concatenate(([0], (grid[:, e] == t).astype(np.int8), [0]))
+            edges = np.flatnonzero(np.diff(on_task))
+            runs = list(zip(edges[::2].tolist(), edges[1::2].tolist()))
+            for k, (start, size, end, presence) in enumerate(legs):
+                if k < len(runs):
+                    run_start, run_end = runs[k]
+                    self.model.AddHint(presence, 1)
+                    self.model.AddHint(start, run_start)
+                    self.model.AddHint(size, run_end - run_start)
+                    self.model.AddHint(end, run_end)
+                else:
+                    self.model.AddHint(presence, 0)
+                    self.model.AddHint(size, 0)
+
+    def _workload_terms(self, e: int) -> List:
+        legs = [leg[1] for (ee, t), legs in self.legs.items() if ee == e for leg in legs]
+        return super()._workload_terms(e) + legs
+
+    def _build_model(self, e_range, t_range, s_range):
+        # 1. Variables Definition
+        # x[e, t, s] for fixed tasks: one unit-size optional interval per allowed block
+        intervals = {e: [] for e in e_range}
+        for e in e_range:
+            for t in t_range:
+                if not self.tasks[t].is_fixed():
+                    continue
+                for s in self._allowed_blocks(e, t):
+                    x = self.model.NewBoolVar(f"x_e{e}_t{t}_s{s}")
+                    self.x[e, t, s] = x
+                    intervals[e].append(self.model.NewOptionalFixedSizeIntervalVar(s, 1, x, f"cell_e{e}_t{t}_s{s}"))
+
+        # Legs for flexible tasks: K optional intervals per (employee, task) with variable length
         for e in e_range:
             emp_obj = self.employees[e]
+            if not emp_obj.shifts:
+                continue
+            longest_shift = max(shift.duration() for shift in emp_obj.shifts)
+            n_legs = LEGS_PER_SHIFT * len(emp_obj.shifts)
+            # Legs start and end inside a shift: sparse domains over the coalesced shift ranges
+            bounds = [
+                (max(0, shift.start_block), min(TOTAL_BLOCKS, shift.end_block))
+                for shift in emp_obj.shifts
+            ]
+            bounds = [(lo, hi) for lo, hi in bounds if hi > lo]
+            if not bounds:
+                continue
+            start_domain = cp_model.Domain.FromIntervals([[lo, hi - 1] for lo, hi in bounds])
+            # Ends may equal a start so that absent legs can collapse (end == start)
+            end_domain = cp_model.Domain.FromIntervals([[lo, hi] for lo, hi in bounds])
             for t in t_range:
                 task_obj = self.tasks[t]
+                if task_obj.is_fixed() or not self.allowed[e, t].any():
+                    continue
+                max_len = min(longest_shift, int(task_obj.effort_required))
+                if max_len <= 0:
+                    continue
+
+                legs = []
+                for k in range(n_legs):
+                    start = self.model.NewIntVarFromDomain(start_domain, f"start_e{e}_t{t}_k{k}")
+                    size = self.model.NewIntVar(0, max_len, f"size_e{e}_t{t}_k{k}")
+                    end = self.model.NewIntVarFromDomain(end_domain, f"end_e{e}_t{t}_k{k}")
+                    presence = self.model.NewBoolVar(f"leg_e{e}_t{t}_k{k}")
+                    intervals[e].append(self.model.NewOptionalIntervalVar(start, size, end, presence, f"leg_e{e}_t{t}_k{k}"))
+                    # Absent legs have no length (end == start), present legs at least one block
+                    self.model.Add(size >= 1).OnlyEnforceIf(presence)
+                    self.model.Add(size == 0).OnlyEnforceIf(presence.Not())
+                    self.model.Add(end == start).OnlyEnforceIf(presence.Not())
+
+                    if legs:
+                        # Legs are used in order and never touch (touching legs are one leg)
+                        prev_end, prev_presence = legs[-1][2], legs[-1][3]
+                        self.model.AddImplication(presence, prev_presence)
+                        self.model.Add(start >= prev_end + 1).OnlyEnforceIf(presence)
+                    legs.append((start, size, end, presence))
+                self.legs[(e, t)] = legs
+
+        # 2. Hard Constraints
+
+        # A. Availability: Employee can only work if they have a shift containing block s
+        # (fixed-task cells only exist on shift; legs are kept out by off-shift blockers)
+        for e in e_range:
+            emp_obj = self.employees[e]
+            off_start = None
+            for s in range(TOTAL_BLOCKS + 1):
+                available = s < TOTAL_BLOCKS and emp_obj.is_available(s)
+                if not available and s < TOTAL_BLOCKS:
+                    if off_start is None:
+                        off_start = s
+                elif off_start is not None:
+                    # Off-shift periods block the employee's timeline for legs
+                    intervals[e].append(self.model.NewIntervalVar(off_start, s - off_start, s, f"off_e{e}_s{off_start}"))
+                    off_start = None
+
+        # B. Employee Exclusivity: At most 1 task per employee per block
+        for e in e_range:
+            self.model.AddNoOverlap(intervals[e])
+
+        # C. Task Capacity / Demand
+        for t in t_range:
+            task_obj = self.tasks[t]
+
+            if task_obj.is_fixed():
+                # --- FIXED SCHEDULE TASK (e.g. Caixa) ---
+                # Must meet specific staffing demand at each time block
+                demand_curve = task_obj.demand_curve
+
                 for s in s_range:
-                    if self.solver.Value(self.x[(e, t, s)]) == 1:
-                        # Direct assignment bypassing strict checking (as we trust the solver)
-                        # We just populate the grid.
-                        # Note: Sched.grid is Dict[emp_id, task_id]
-                        sched.grid[s][emp_obj.id] = task_obj.id
-        
+                    demand = demand_curve[s] if s < len(demand_curve) else 0
+
+                    if demand > 0:
+                        # Sum of assigned employees >= demand
+                        self._add_demand(e_range, t, s, demand)
+                    # Zero demand: no cells exist, which prevents ghost working.
+
+            else:
+                # --- FLEXIBLE TASK (e.g. Reposicao) ---
+                # 1. Total Volume Requirement
+                # Multiple people can work on it in parallel, so only the total is fixed.
+                required_blocks = int(task_obj.effort_required)
+                sizes = [leg[1] for e in e_range for leg in self.legs.get((e, t), [])]
+                self.model.Add(cp_model.LinearExpr.Sum(sizes) == required_blocks)
+
+        # D. Symmetry Breaking among interchangeable employees
+        self._add_symmetry_breaking()
+
+
+        # 3. Objective Function (Soft Constraints & Costs)
+        # Objective terms are collected as flat (var, coef) lists and summed once
+        obj_vars, obj_coefs = [], []
+
+        # A. Preference / Capability Cost
+        # Base penalty per block, only for (employee, task) pairs outside the profile
+        penalty = 5
+        for e, t in np.argwhere(~self.ideal).tolist():
+            if self.tasks[t].is_fixed():
+                cells = self._present(self.x[e, t])
+            else:
+                cells = [leg[1] for leg in self.legs.get((e, t), [])]
+            obj_vars.extend(cells)
+            obj_coefs.extend([penalty] * len(cells))
+
+        # B. Switching Costs (Continuity)
+        for e in e_range:
+            emp_obj = self.employees[e]
+            if emp_obj.switch_cost <= 0:
+                continue
+
+            # Weighted switch cost
+            cost_weight = int(emp_obj.switch_cost * 100)
+
+            # Every leg is one task segment; as in the dense model, a segment
+            # starting at block 0 is not a switch. Only the first leg can start there,
+            # later present legs start after a present predecessor.
+            for t in t_range:
+                for k, (start, size, end, presence) in enumerate(self.legs.get((e, t), [])):
+                    if k > 0 or not emp_obj.is_available(0):
+                        obj_vars.append(presence)
+                    else:
+                        at_zero = self.model.NewBoolVar(f"zero_e{e}_t{t}_k{k}")
+                        self.model.Add(start == 0).OnlyEnforceIf(at_zero)
+                        self.model.Add(start >= 1).OnlyEnforceIf(at_zero.Not())
+                        # switched >= presence - at_zero
+                        switched = self.model.NewBoolVar(f"switch_e{e}_t{t}_k{k}")
+                        self.model.Add(switched >= presence - at_zero)
+                        obj_vars.append(switched)
+                    obj_coefs.append(cost_weight)
+
+            # Fixed-task cells (the only variables in self.x)
+            self._add_start_terms(e, t_range, cost_weight, obj_vars, obj_coefs)
+
+        # C. Priority Scheduling (High Priority Flexible Tasks -> Early)
+        # A leg [start, end) costs sum(coef[start:end]) = prefix[end] - prefix[start],
+        # the dense model's per-block coefficients exactly (0 for absent legs: end == start)
+        half_triangular = [n * (n - 1) // 2 for n in range(TOTAL_BLOCKS + 1)]
+        for t in t_range:
+            task_obj = self.tasks[t]
+            if task_obj.is_fixed():
+                continue
+
+            coef = self._priority_coefs(task_obj)
+            prefix = np.concatenate(([0], np.cumsum(coef))).tolist()
+            # Element lookups alone relax poorly, so also post the linear bound
+            # den * coef[s] >= num * s - slack, with num/den = 0.1 * weight, summed over the leg:
+            # den * cost >= num * (size * start + size * (size - 1) / 2) - slack * size
+            rate = Fraction(20, max(1, task_obj.priority)) / 10
+            num, den = rate.numerator, rate.denominator
+            slack = int(max(num * s - den * int(c) for s, c in enumerate(coef)))
+
+            for e in e_range:
+                for k, (start, size, end, presence) in enumerate(self.legs.get((e, t), [])):
+                    cost_end = self.model.NewIntVar(0, prefix[-1], f"pe_e{e}_t{t}_k{k}")
+                    cost_start = self.model.NewIntVar(0, prefix[-1], f"ps_e{e}_t{t}_k{k}")
+                    self.model.AddElement(end, prefix, cost_end)
+                    self.model.AddElement(start, prefix, cost_start)
+
+                    size_x_start = self.model.NewIntVar(0, TOTAL_BLOCKS * TOTAL_BLOCKS, f"ss_e{e}_t{t}_k{k}")
+                    self.model.AddMultiplicationEquality(size_x_start, [size, start])
+                    tri = self.model.NewIntVar(0, half_triangular[-1], f"tri_e{e}_t{t}_k{k}")
+                    self.model.AddElement(size, half_triangular, tri)
+                    self.model.Add(
+                        den * (cost_end - cost_start) >= num * (size_x_start + tri) - slack * size
+                    )
+
+                    obj_vars.extend((cost_end, cost_start))
+                    obj_coefs.extend((1, -1))
+
+        # Minimize
+        self.model.Minimize(cp_model.LinearExpr.WeightedSum(obj_vars, obj_coefs))
+
+    def _build_schedule_from_solution(self, e_range, t_range, s_range) -> Schedule:
+        sched = Schedule(self.employees, self.tasks)
+
+        solution = self._solution_values()
+
+        # Direct assignment bypassing strict checking (as we trust the solver)
+        # We just populate the grid.
+        # Note: Sched.grid is [block, emp_idx] -> task_idx
+        e_idx, t_idx, s_idx = np.nonzero(self._x_values(solution))
+        sched.grid[s_idx, e_idx] = t_idx
+
+        for (e, t), legs in self.legs.items():
+            for start, size, end, presence in legs:
+                if solution[presence.Index()]:
+                    sched.grid[solution[start.Index()]:solution[end.Index()], e] = t
+
+        sched.refresh_busy_bits()
         return sched
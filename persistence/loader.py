@@ -1,21 +1,42 @@
 import tomllib
-from typing import List, Dict, Any
-from model import Employee, Shift, Task, time_to_block, TOTAL_BLOCKS, START_HOUR, END_HOUR
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
 
+import numpy as np
+
+from model import Employee, Shift, Task, time_to_block, time_to_block_array, TOTAL_BLOCKS, START_HOUR, END_HOUR
+
+@lru_cache(maxsize=4)
 def load_toml(file_path: str) -> Dict[str, Any]:
+    """Parses a TOML file once per path; callers share the result and must not mutate it."""
     with open(file_path, "rb") as f:
         return tomllib.load(f)
 
+@lru_cache(maxsize=2048)
+def _split_hhmm(time_str: str) -> Tuple[int, int]:
+    """Splits 'HH:MM' into (hours, minutes); the fixed-width form is read digit by digit."""
+    if len(time_str) == 5 and time_str[2] == ":" and time_str.isascii() \
+            and time_str[:2].isdigit() and time_str[3:].isdigit():
+        return (ord(time_str[0]) - 48) * 10 + ord(time_str[1]) - 48, (ord(time_str[3]) - 48) * 10 + ord(time_str[4]) - 48
+    hours, minutes = map(int, time_str.split(":"))
+    return hours, minutes
+
+@lru_cache(maxsize=2048)
 def parse_time_str(time_str: str) -> int:
     """Converts 'HH:MM' string to block index (5-min resolution)."""
     try:
-        hours, minutes = map(int, time_str.split(":"))
+        hours, minutes = _split_hhmm(time_str)
         return time_to_block(hours, minutes)
     except ValueError as e:
         raise ValueError(f"Invalid time format '{time_str}': {e}")
 
 def parse_time_range(range_str: str) -> Shift:
     """Converts 'HH:MM-HH:MM' to a Shift object."""
+    # Shift is mutable, so only the block bounds are cached
+    return Shift(*_parse_range_blocks(range_str))
+
+@lru_cache(maxsize=2048)
+def _parse_range_blocks(range_str: str) -> Tuple[int, int]:
     try:
         start_str, end_str = range_str.split("-")
         start_block = parse_time_str(start_str)
@@ -31,9 +52,7 @@ def parse_time_range(range_str: str) -> Shift:
         # Let's adjust logic in model.py later to handle this, or handle it here.
         # For "00:30", let's treat it as hour 24.
         
-        end_parts = end_str.split(":")
-        end_h = int(end_parts[0])
-        end_m = int(end_parts[1])
+        end_h, end_m = _split_hhmm(end_str)
         if end_h < START_HOUR: 
              # likely next day, e.g. 00:30. Add 24h? 
              # Or just strictly use linear hours. 
@@ -42,11 +61,57 @@ def parse_time_range(range_str: str) -> Shift:
              end_h += 24
              
         end_block = time_to_block(end_h, end_m)
-        return Shift(start_block, end_block)
+        return start_block, end_block
     except Exception as e:
         # Re-raise with context
         raise ValueError(f"Error parsing range '{range_str}': {e}")
 
+def _hhmm_arrays(time_strs: np.ndarray) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """(hours, minutes) of a batch of fixed-width 'HH:MM' strings, or None if any is not."""
+    if not (np.char.str_len(time_strs) == 5).all():
+        return None
+    # UCS-4 code points of each character, minus ord("0")
+    codes = time_strs.astype("U5").view(np.uint32).reshape(-1, 5).astype(np.int32) - 48
+    digits = codes[:, [0, 1, 3, 4]]
+    if not ((codes[:, 2] == ord(":") - 48).all() and ((digits >= 0) & (digits <= 9)).all()):
+        return None
+    return codes[:, 0] * 10 + codes[:, 1], codes[:, 3] * 10 + codes[:, 4]
+
+def parse_time_strs(time_strs: List[str]) -> np.ndarray:
+    """Converts a batch of 'HH:MM' strings to block indices in one vectorized call."""
+    if len(time_strs) == 0:
+        return np.zeros(0, dtype=np.int32)
+    fixed = _hhmm_arrays(np.asarray(time_strs, dtype=str))
+    if fixed is not None:
+        return time_to_block_array(*fixed)
+    # Irregular input (e.g. '8:30'): per-string fallback, which also reports the bad value
+    parts = []
+    for t in time_strs:
+        try:
+            parts.append(_split_hhmm(str(t)))
+        except ValueError as e:
+            raise ValueError(f"Invalid time format '{t}': {e}")
+    hours = np.fromiter((h for h, _ in parts), dtype=np.int32, count=len(parts))
+    minutes = np.fromiter((m for _, m in parts), dtype=np.int32, count=len(parts))
+    return time_to_block_array(hours, minutes)
+
+def parse_time_ranges(range_strs: List[str]) -> List[Shift]:
+    """Converts a batch of 'HH:MM-HH:MM' strings to Shift objects."""
+    if not range_strs:
+        return []
+    parts = np.char.partition(np.asarray(range_strs, dtype=str), "-")
+    bad = np.flatnonzero((parts[:, 1] != "-") | (np.char.find(parts[:, 2], "-") >= 0))
+    if bad.size:
+        raise ValueError(f"Error parsing range '{range_strs[bad[0]]}': expected 'HH:MM-HH:MM'")
+    # Interleaved [start0, end0, start1, end1, ...]
+    # End times before START_HOUR (e.g. 00:30) wrap to the next day in time_to_block_array.
+    try:
+        blocks = parse_time_strs(parts[:, ::2].ravel())
+    except ValueError:
+        # Re-parse one range at a time so the error names the offending range
+        return [Shift(*_parse_range_blocks(str(r))) for r in range_strs]
+    return [Shift(int(blocks[i]), int(blocks[i + 1])) for i in range(0, len(blocks), 2)]
+
 def load_employees(file_path: str) -> List[Employee]:
     data = load_toml(file_path)
     employees = []
@@ -64,27 +129,34 @@ def load_employees_for_day(file_path: str, day_key: str = "segunda") -> List[Emp
     data = load_toml(file_path)
     employee_list = []
     
-    for emp_data in data.get("funcionarios", []):
-        name = emp_data.get("nome", "Unknown")
-        category = emp_data.get("categoria", "standard")
-        profile = emp_data.get("perfil", "standard")
-        skills = emp_data.get("competencias", [])
-        
+    # Collect every interval first so they can be parsed in a single batch
+    funcionarios = data.get("funcionarios", [])
+    day_ranges = []
+    for emp_data in funcionarios:
         # Schedule parsing
         # horarios = emp_data.get("horarios", {}) 
         # The file format was flattened: schedules are direct keys.
         day_schedule = emp_data.get(day_key, "VAZIO")
         
-        shifts = []
         if isinstance(day_schedule, list):
-            for interval in day_schedule:
-                shifts.append(parse_time_range(interval))
-        elif isinstance(day_schedule, str):
-            if "-" in day_schedule: # Single interval "08:00-12:00"
-                shifts.append(parse_time_range(day_schedule))
-            else:
-                # "VAZIO", "Folga...", etc. -> No shifts.
-                pass
+            day_ranges.append(day_schedule)
+        elif isinstance(day_schedule, str) and "-" in day_schedule:
+            day_ranges.append([day_schedule]) # Single interval "08:00-12:00"
+        else:
+            # "VAZIO", "Folga...", etc. -> No shifts.
+            day_ranges.append([])
+
+    all_shifts = parse_time_ranges([r for ranges in day_ranges for r in ranges])
+    offset = 0
+
+    for emp_data, ranges in zip(funcionarios, day_ranges):
+        name = emp_data.get("nome", "Unknown")
+        category = emp_data.get("categoria", "standard")
+        profile = emp_data.get("perfil", "standard")
+        skills = frozenset(emp_data.get("competencias", []))
+        
+        shifts = all_shifts[offset:offset + len(ranges)]
+        offset += len(ranges)
         
         # Create Employee
         # We need to map profile to params? Or just store profile string?
@@ -139,16 +211,19 @@ def load_tasks(file_path: str, day_key: str = "segunda") -> List[Task]:
             # Parse flow to demand curve
             # Format: [{ inicio="08:00", fim="10:30", funcionarios=1 }, ...]
             flow_list = t_data[flow_key]
-            demand_curve = [0] * TOTAL_BLOCKS
-            for interval in flow_list:
-                start = parse_time_str(interval["inicio"])
-                end = parse_time_str(interval["fim"])
-                count = interval["funcionarios"]
-                for b in range(start, end):
-                    if b < TOTAL_BLOCKS:
-                        demand_curve[b] = count
+            # Staff steps up at each start and down at each end: one cumulative sum.
+            # Overlapping intervals add up.
+            starts = np.clip(parse_time_strs([interval["inicio"] for interval in flow_list]), 0, TOTAL_BLOCKS)
+            ends = np.clip(parse_time_strs([interval["fim"] for interval in flow_list]), 0, TOTAL_BLOCKS)
+            counts = np.fromiter((interval["funcionarios"] for interval in flow_list), dtype=np.int32, count=len(flow_list))
+            valid = ends > starts
+            delta = np.zeros(TOTAL_BLOCKS + 1, dtype=np.int32)
+            np.add.at(delta, starts[valid], counts[valid])
+            np.subtract.at(delta, ends[valid], counts[valid])
+            dc = np.cumsum(delta[:-1], dtype=np.int32)
+            demand_curve = dc.tolist()
             is_fixed = True
-            effort = sum(demand_curve) # Total person-blocks needed
+            effort = int(dc.sum()) # Total person-blocks needed
         else:
             # Volume based
             # carga_paletes = { segunda = 5 ... }
@@ -0,0 +1,9 @@
+# Optional: builds the Cython metrics kernel (model_metrics.pyx) in place.
+#   python setup.py build_ext --inplace
+from setuptools import setup
+from Cython.Build import cythonize
+
+setup(
+    name="reposicao-metrics",
+    ext_modules=cythonize("model_metrics.pyx"),
+)